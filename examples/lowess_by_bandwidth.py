@@ -68,10 +68,11 @@ if __name__ == "__main__":
     # Create a Pandas DataFrame with the data
     df = pd.DataFrame({'x': x, 'Raw': y})
 
-    # Smooth the data
+    # Prepare the data once, then smooth it for each bandwidth
+    prepared = lowess.prepare(df['x'], df['Raw'])
     for i in ['0.05', '0.1', '0.3', '0.5', '0.7']:
         label = 'bandwidth={}'.format(i)
-        df[label] = lowess.lowess(df['x'], df['Raw'], bandwidth=float(i),
+        df[label] = lowess.smooth(prepared, bandwidth=float(i),
                                   polynomialDegree=1)
 
     # Plot the data
@@ -68,10 +68,11 @@ if __name__ == "__main__":
     # Create a Pandas DataFrame with the data
     df = pd.DataFrame({'x': x, 'Raw': y})
 
-    # Smooth the data
+    # Prepare the data once, then smooth it for each polynomial degree
+    prepared = lowess.prepare(df['x'], df['Raw'])
     for i in range(5):
         label = 'polynomialDegree={}'.format(i)
-        df[label] = lowess.lowess(df['x'], df['Raw'], bandwidth=0.3,
+        df[label] = lowess.smooth(prepared, bandwidth=0.3,
                                   polynomialDegree=i)
 
     # Plot the data
@@ -1,4 +1,6 @@
 # __init__.py
 from .lowess import lowess
+from .lowess import prepare
+from .lowess import smooth
 from .lowess import LowessError
 from .lowess import __version__
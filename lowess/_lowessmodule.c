@@ -0,0 +1,216 @@
+/*
+ * C implementation of the lowess regression loop.
+ *
+ * Mirrors _lowessCore in lowess.py: for each point a window of k
+ * neighbours on either side is taken, tricubic weights are computed
+ * about the centre, and the small normal equations system is solved in
+ * place with Gaussian elimination. The fit is formed in the basis of
+ * powers of (x - centre) for conditioning, so its constant term is the
+ * smoothed value. The points are independent, so the loop is
+ * parallelised with OpenMP where available.
+ *
+ * :author: Andrew Lee
+ * :organization: CCGE, PHPC, The University of Cambridge
+ * :license: GNU General Public License, version 3
+ */
+#define NPY_NO_DEPRECATED_API NPY_1_7_API_VERSION
+#include <Python.h>
+#include <numpy/arrayobject.h>
+#include <math.h>
+
+/* Scale factor applied to the maximum distance within a window so
+ * that the furthest point keeps a small non-zero weight (as per the
+ * STATA definition). Mirrors _DMAX_SCALE in lowess.py. */
+#define DMAX_SCALE 1.0001
+
+/* Points whose tricubic weight falls below this contribute nothing at
+ * the accuracy the package works to, so the kernel skips them. Mirrors
+ * _WEIGHT_EPS in lowess.py. */
+#define WEIGHT_EPS 1e-9
+
+/* Maximum polynomial degree the kernel accepts. The per point scratch
+ * arrays are sized by the degree; fixing them at compile time keeps
+ * them small on each OpenMP thread's stack and avoids variable length
+ * arrays, which MSVC does not support. lowessCore rejects larger
+ * degrees, and smooth() falls back to another backend for them. The
+ * limit is exported as _lowess.MAX_DEGREE. */
+#define MAX_DEGREE 15
+#define MAX_COEFFS (MAX_DEGREE + 1)
+
+static void
+lowessKernel(const double *xs, const double *ys, npy_intp N, long k,
+             long nCoeffs, double *smoothed)
+{
+    npy_intp i;
+
+#ifdef _OPENMP
+#pragma omp parallel for schedule(static)
+#endif
+    for (i = 0; i < N; i++) {
+        npy_intp lo = i - k > 0 ? i - k : 0;
+        npy_intp hi = i + k + 1 < N ? i + k + 1 : N;
+        double xi = xs[i];
+        double lhs[MAX_COEFFS * MAX_COEFFS];
+        double rhs[MAX_COEFFS];
+        double mono[MAX_COEFFS];
+        double beta[MAX_COEFFS];
+        double maxDiff, scale;
+        npy_intp j;
+        long p, q, col, row;
+
+        /* The window is sorted and contains its centre, so the maximum
+         * distance from the centre is attained at one of the ends. */
+        maxDiff = xi - xs[lo] > xs[hi - 1] - xi ? xi - xs[lo]
+                                                : xs[hi - 1] - xi;
+        scale = DMAX_SCALE * maxDiff;
+
+        /* Accumulate the normal equations (M'WM) beta = (M'W) y in the
+         * basis of powers of (x - xi), which keeps the system well
+         * conditioned. */
+        for (p = 0; p < nCoeffs * nCoeffs; p++)
+            lhs[p] = 0.0;
+        for (p = 0; p < nCoeffs; p++)
+            rhs[p] = 0.0;
+        for (j = lo; j < hi; j++) {
+            double u = fabs(xs[j] - xi) / scale;
+            double t = 1.0 - u * u * u;
+            double w = t * t * t;
+            /* The weight of the outermost points is negligible; skip
+             * them rather than accumulating terms that change
+             * nothing. */
+            if (w < WEIGHT_EPS)
+                continue;
+            mono[0] = 1.0;
+            for (p = 1; p < nCoeffs; p++)
+                mono[p] = mono[p - 1] * (xs[j] - xi);
+            for (p = 0; p < nCoeffs; p++) {
+                for (q = 0; q < nCoeffs; q++)
+                    lhs[p * nCoeffs + q] += w * mono[p] * mono[q];
+                rhs[p] += w * mono[p] * ys[j];
+            }
+        }
+
+        /* Gaussian elimination with partial pivoting. */
+        for (col = 0; col < nCoeffs; col++) {
+            long pivot = col;
+            for (row = col + 1; row < nCoeffs; row++) {
+                if (fabs(lhs[row * nCoeffs + col]) >
+                    fabs(lhs[pivot * nCoeffs + col]))
+                    pivot = row;
+            }
+            if (pivot != col) {
+                double tmp;
+                for (q = col; q < nCoeffs; q++) {
+                    tmp = lhs[col * nCoeffs + q];
+                    lhs[col * nCoeffs + q] = lhs[pivot * nCoeffs + q];
+                    lhs[pivot * nCoeffs + q] = tmp;
+                }
+                tmp = rhs[col];
+                rhs[col] = rhs[pivot];
+                rhs[pivot] = tmp;
+            }
+            for (row = col + 1; row < nCoeffs; row++) {
+                double factor = lhs[row * nCoeffs + col] /
+                                lhs[col * nCoeffs + col];
+                for (q = col; q < nCoeffs; q++)
+                    lhs[row * nCoeffs + q] -= factor * lhs[col * nCoeffs + q];
+                rhs[row] -= factor * rhs[col];
+            }
+        }
+
+        /* Back substitution. */
+        for (row = nCoeffs - 1; row >= 0; row--) {
+            double acc = rhs[row];
+            for (q = row + 1; q < nCoeffs; q++)
+                acc -= lhs[row * nCoeffs + q] * beta[q];
+            beta[row] = acc / lhs[row * nCoeffs + row];
+        }
+
+        /* In the centred basis the constant term is the fitted value at
+         * the centre point. */
+        smoothed[i] = beta[0];
+    }
+}
+
+static PyObject *
+lowessCore(PyObject *self, PyObject *args)
+{
+    PyObject *xsObj, *ysObj;
+    PyArrayObject *xs, *ys, *smoothed;
+    long k, polynomialDegree;
+    npy_intp N;
+
+    if (!PyArg_ParseTuple(args, "OOll", &xsObj, &ysObj, &k,
+                          &polynomialDegree))
+        return NULL;
+    if (polynomialDegree < 0) {
+        PyErr_SetString(PyExc_ValueError,
+                        "polynomialDegree is less than zero.");
+        return NULL;
+    }
+    if (polynomialDegree > MAX_DEGREE) {
+        PyErr_SetString(PyExc_ValueError,
+                        "polynomialDegree is larger than MAX_DEGREE.");
+        return NULL;
+    }
+
+    xs = (PyArrayObject *)PyArray_FROM_OTF(xsObj, NPY_DOUBLE,
+                                           NPY_ARRAY_IN_ARRAY);
+    if (xs == NULL)
+        return NULL;
+    ys = (PyArrayObject *)PyArray_FROM_OTF(ysObj, NPY_DOUBLE,
+                                           NPY_ARRAY_IN_ARRAY);
+    if (ys == NULL) {
+        Py_DECREF(xs);
+        return NULL;
+    }
+
+    N = PyArray_DIM(xs, 0);
+    smoothed = (PyArrayObject *)PyArray_SimpleNew(1, &N, NPY_DOUBLE);
+    if (smoothed == NULL) {
+        Py_DECREF(xs);
+        Py_DECREF(ys);
+        return NULL;
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    lowessKernel((const double *)PyArray_DATA(xs),
+                 (const double *)PyArray_DATA(ys),
+                 N, k, polynomialDegree + 1,
+                 (double *)PyArray_DATA(smoothed));
+    Py_END_ALLOW_THREADS
+
+    Py_DECREF(xs);
+    Py_DECREF(ys);
+    return (PyObject *)smoothed;
+}
+
+static PyMethodDef LowessMethods[] = {
+    {"lowessCore", lowessCore, METH_VARARGS,
+     "Smoothed y values for sorted float64 arrays xs and ys."},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef lowessmodule = {
+    PyModuleDef_HEAD_INIT,
+    "_lowess",
+    "C kernel for the lowess regression loop.",
+    -1,
+    LowessMethods
+};
+
+PyMODINIT_FUNC
+PyInit__lowess(void)
+{
+    PyObject *module;
+
+    import_array();
+    module = PyModule_Create(&lowessmodule);
+    if (module == NULL)
+        return NULL;
+    if (PyModule_AddIntConstant(module, "MAX_DEGREE", MAX_DEGREE) < 0) {
+        Py_DECREF(module);
+        return NULL;
+    }
+    return module;
+}
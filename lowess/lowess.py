@@ -4,12 +4,67 @@
 :license: GNU General Public License, version 3
 :contact: ajl65@medschl.cam.ac.uk
 '''
+import collections
+import concurrent.futures
+import os
+
 import numpy as np
 import pandas as pd
 
+# The compiled C kernel is optional; it is only built when a compiler
+# and the NumPy headers are available at install time.
+try:
+    from . import _lowess
+    _HAVE_CEXT = True
+except ImportError:
+    _HAVE_CEXT = False
+
+# Numba is an optional dependency. When it is available the regression
+# loop is JIT compiled and parallelised across cores; otherwise the
+# vectorised NumPy implementation is used.
+try:
+    from numba import njit, prange
+    _HAVE_NUMBA = True
+except ImportError:
+    prange = range
+    _HAVE_NUMBA = False
+
 
 __version__ = '1.0.3'
 
+# Maximum number of window elements (points times window width) that
+# the NumPy backend materialises at once. The batched window arrays
+# grow as points times window width, which is quadratic in the series
+# length for a fixed bandwidth, so without a cap long series exhaust
+# memory. Blocks of this size keep the peak to a few tens of MB while
+# remaining large enough to amortise the per-block overhead.
+_BLOCK_ELEMENTS = 2 ** 20
+
+# Scale factor applied to the maximum distance within a window so that
+# the furthest point keeps a small non-zero weight (as per the STATA
+# definition).
+_DMAX_SCALE = 1.0001
+
+# Points whose tricubic weight falls below this contribute nothing at
+# the accuracy the package works to, so the compiled kernels skip them.
+_WEIGHT_EPS = 1e-9
+
+# Lookup table for the tricubic kernel (1 - u**3)**3 on u in [0, 1],
+# precomputed once at import, evaluated with multiplications rather
+# than pow. Linear interpolation between the entries is accurate to
+# about 1e-7 (the measured maximum error is 7e-8, attained where the
+# kernel's curvature is largest).
+_TRICUBE_U = np.linspace(0.0, 1.0, 4097)
+_TRICUBE = (1.0 - _TRICUBE_U * _TRICUBE_U * _TRICUBE_U)
+_TRICUBE = _TRICUBE * _TRICUBE * _TRICUBE
+
+# Validated, aligned and sorted data produced by prepare() and consumed
+# by smooth(); holds the sorted values, the sorting permutation and its
+# inverse, and the original indices of x and y.
+Prepared = collections.namedtuple('Prepared',
+                                  ['xs', 'ys', 'order', 'inverse',
+                                   'xIndex', 'yIndex'])
+
 
 class LowessError(Exception):
     '''
@@ -50,27 +105,132 @@ def lowess(x, y, bandwidth=0.2, polynomialDegree=1):
 
     '''
 
+    return smooth(prepare(x, y), bandwidth, polynomialDegree)
+
+
+def prepare(x, y):
+    '''
+    Validate and preprocess the data for repeated smoothing.
+
+    The returned object holds the validated values, aligned and sorted
+    once, so that several smooth() calls with different bandwidths or
+    polynomial degrees (for example a bandwidth sweep) do not repeat
+    the validation and sort.
+
+    Args:
+        x (pandas.core.series.Series): a Pandas Series containing the x
+            (independent/covariat) values. The indices must be unique.
+        y (pandas.core.series.Series): a Pandas Series containing the y
+            (dependent) values. It must have the same index as x, although
+            not necessarily in the same order.
+
+    Returns:
+        Prepared: the prepared data to pass to smooth().
+
+    Raises:
+        LowessError: If input is not valid.
+
+    '''
+
+    # Validate the data
+    _validateData(x, y)
+
+    # Convert to NumPy arrays once, aligning y to the index of x, then
+    # sort the values, keeping track of the original order and its
+    # inverse.
+    xv = x.to_numpy(np.float64)
+    yv = y.reindex(x.index).to_numpy(np.float64)
+    order = np.argsort(xv, kind='stable')
+    inverse = np.empty_like(order)
+    inverse[order] = np.arange(len(order))
+    return Prepared(xv[order], yv[order], order, inverse, x.index, y.index)
+
+
+def smooth(prepared, bandwidth=0.2, polynomialDegree=1):
+    '''
+    Calculate the lowess smoothed estimate from prepared data.
+
+    Args:
+        prepared (Prepared): the output of prepare().
+        bandwidth (float, optional): the bandwidth for smoothing. It must be
+            between 0 and 1.
+        polynomialDegree (int, optional): The degree of polynomial to use in
+            the regression. It must be >= 0.
+
+    Returns:
+        pandas.core.series.Series: a Pandas Series containing the smoothed y
+            values.
+
+    Raises:
+        LowessError: If input is not valid or an error occurs.
+
+    '''
+
     # Validate the inputs
-    validateInput(x, y, bandwidth, polynomialDegree)
+    if not isinstance(prepared, Prepared):
+        raise LowessError('prepared is not the output of prepare().')
+    _validateParameters(bandwidth, polynomialDegree)
 
-    # Initialise a Pandas Series for the results.
-    ySmooth = pd.Series(index=y.index, dtype=y.dtype)
+    xs = prepared.xs
+    ys = prepared.ys
+    N = len(xs)
 
-    # Create maps from the index to the ordinal position (based on value)
-    # and back.
-    mapI2P, mapP2I = Index2PositionMap(x)
+    # Calculate the number of points corresponding to the bandwidth
+    k = max(int(np.floor((N * bandwidth - 0.5) / 2.0)), 0)
 
-    # Loop through x values, and perfrom a regression for each.
-    for index, value in x.items():
-        # Determine the set of points to use in the regression.
-        points, point = neighbours(mapP2I, mapI2P[index], bandwidth)
-        # Determine the weights for the regression
-        weights = triCubicWeights(x[points], value)
-        # Perform the regression
-        ySmooth[index] = wLstSqReg(x[points], y[points], polynomialDegree,
-                                   weights)[point]
+    # Check that there are at least as many data points in the smallest
+    # window as regression coefficients (unknowns). An under determined
+    # window makes its normal equations singular, so the regression
+    # would fail anyway; checking up front gives the clearer message.
+    if k + 1 < polynomialDegree:
+        raise LowessError('The least squares regreesion is under determined.'
+                          'There are more fit variables than data points.')
 
-    return ySmooth
+    # Use the fastest available backend for the regression loop: the C
+    # kernel (whose scratch arrays are sized at compile time, so it only
+    # accepts degrees up to _lowess.MAX_DEGREE), then the Numba kernel,
+    # then the vectorised NumPy path. An empty series smooths to an
+    # empty result; short circuit it so the block arithmetic below need
+    # not handle zero blocks.
+    smoothed = None
+    if N == 0:
+        smoothed = np.empty(0)
+    elif _HAVE_CEXT and polynomialDegree <= _lowess.MAX_DEGREE:
+        smoothed = _lowess.lowessCore(xs, ys, int(k),
+                                      int(polynomialDegree))
+    elif _HAVE_NUMBA:
+        smoothed = _lowessCore(xs, ys, k, polynomialDegree)
+    if smoothed is not None:
+        if not np.all(np.isfinite(smoothed)):
+            raise LowessError('The least squares regression failed.')
+    else:
+        # The points are independent and the batched arrays are bounded
+        # per block (see _BLOCK_ELEMENTS), so split the work into those
+        # same blocks and smooth them on a thread pool when there are
+        # several. NumPy releases the GIL in its inner loops, so threads
+        # scale, and each worker holds at most one block's arrays.
+        blockRows = max(_BLOCK_ELEMENTS // (2 * k + 1), 1)
+        bounds = list(range(0, N, blockRows)) + [N]
+        nThreads = min(os.cpu_count() or 1, len(bounds) - 1)
+        if nThreads > 1:
+            with concurrent.futures.ThreadPoolExecutor(nThreads) as pool:
+                smoothed = np.concatenate(list(pool.map(
+                    lambda block: _smoothBlock(xs, ys, k, polynomialDegree,
+                                               block[0], block[1]),
+                    zip(bounds[:-1], bounds[1:]))))
+        else:
+            smoothed = np.concatenate([
+                _smoothBlock(xs, ys, k, polynomialDegree, blockStart,
+                             blockStop)
+                for blockStart, blockStop in zip(bounds[:-1], bounds[1:])])
+
+    # Restore the original ordering of the results with the inverse of
+    # the sorting permutation; a label based reindex is only needed if y
+    # is ordered differently to x.
+    result = pd.Series(smoothed[prepared.inverse], index=prepared.xIndex)
+    if prepared.xIndex.equals(prepared.yIndex):
+        return result
+    return result.reindex(prepared.yIndex)
 
 
 def validateInput(x, y, bandwidth, polynomialDegree):
@@ -92,6 +252,26 @@ def validateInput(x, y, bandwidth, polynomialDegree):
 
     '''
 
+    _validateData(x, y)
+    _validateParameters(bandwidth, polynomialDegree)
+    return
+
+
+def _validateData(x, y):
+    '''
+    Validate the x and y data for the lowess smoothing.
+
+    Args:
+        x (pandas.core.series.Series): a Pandas Series containing the x
+            (independent/covariat) values. The indices must be unique.
+        y (pandas.core.series.Series): a Pandas Series containing the y
+            (dependent) values.
+
+    Raises:
+        LowessError: If input is not valid occurs.
+
+    '''
+
     # Check x and y.
     for s in [x, y]:
         # Check that it is a Pandas Series.
@@ -104,8 +284,10 @@ def validateInput(x, y, bandwidth, polynomialDegree):
         except Exception:
             raise LowessError('x or y is not of numeric type.')
 
-        # Check for Bools
-        if any([isinstance(i, bool) for i in s]):
+        # Check for Bools. A dtype check avoids scanning the values one
+        # Python object at a time; only object dtype needs a value scan.
+        if s.dtype == bool or (s.dtype == object and
+                               (s.map(type) == bool).any()):
             raise LowessError('x or y contains a Bool.')
 
         # Check for null values
@@ -113,15 +295,32 @@ def validateInput(x, y, bandwidth, polynomialDegree):
             raise LowessError('x or y contains null/na/NaN/None values.')
 
     # Check that the index does not contain any duplicate entries.
-    if any(x.index.duplicated()):
+    if x.index.duplicated().any():
         raise LowessError('The index of x contains duplicates.')
 
     # Check that x and y have the same indices.
     if len(y.index) != len(x.index):
         raise LowessError('x and y indices are not the same length.')
-    if not all([i in [i for i in y.index] for i in [i for i in x.index]]):
+    if set(x.index) != set(y.index):
         raise LowessError('x and y indices are not equivalent.')
 
+    return
+
+
+def _validateParameters(bandwidth, polynomialDegree):
+    '''
+    Validate the smoothing parameters.
+
+    Args:
+        bandwidth (float): the bandwidth for smoothing (between 0 and 1)
+        polynomialDegree (int): The degree of polynomial to use in the
+            regression.
+
+    Raises:
+        LowessError: If input is not valid occurs.
+
+    '''
+
     # Check that the value of the bandwidth is within range.
     if not isinstance(bandwidth, float):
         raise LowessError('bandwidth is not a float.')
@@ -143,6 +342,9 @@ def Index2PositionMap(x):
     Create maps from the index to the ordinal position (based on value)
     and back.
 
+    This is retained for backward compatibility; lowess() now works
+    directly with the sorted positions and no longer uses it.
+
     Args:
         x (pandas.core.series.Series): a Pandas Series
 
@@ -156,9 +358,9 @@ def Index2PositionMap(x):
 
     '''
 
-    mapI2P = pd.Series(range(len(x)))
-    mapI2P.index = x.index[x.argsort()]
-    mapP2I = pd.Series(mapI2P.index.values, index=mapI2P)
+    order = np.argsort(x.to_numpy(), kind='stable')
+    mapI2P = pd.Series(np.arange(len(x)), index=x.index[order])
+    mapP2I = pd.Series(x.index.to_numpy()[order])
     return mapI2P, mapP2I
 
 
@@ -167,6 +369,10 @@ def neighbours(mapP2I, pos, bandwidth):
     Determines the set of points within the bandwidth of position,
     and the index of the origianl position within that set.
 
+    This is retained for backward compatibility; lowess() now computes
+    the window bounds arithmetically from the sorted positions and no
+    longer uses it.
+
     Args:
         mapP2I (pandas.core.series.Series): a map from position to index.
         pos (int): the position of the point of interest.
@@ -187,8 +393,10 @@ def neighbours(mapP2I, pos, bandwidth):
     lower = max(0, pos - k)
     upper = min(pos + k + 1, N)
 
-    # Slice the array and get the index of the original point.
-    return mapP2I[lower:upper], mapP2I[lower:upper].index.get_loc(pos)
+    # Slice the array; the offset of the original point within the
+    # window follows directly from the lower bound, with no index
+    # search required.
+    return mapP2I[lower:upper], pos - lower
 
 
 def triCubicWeights(x, xi):
@@ -196,17 +404,19 @@ def triCubicWeights(x, xi):
     Calculate the weights for the regression.
 
     Args:
-        x (pandas.core.series.Series): a set of points.
+        x (numpy.ndarray): a set of points. A Pandas Series is also
+            accepted.
         xi (float): The specific point in the set with respect to which the
             weights are calculated.
 
     Returns:
-        pandas.core.series.Series: The set of regression weights to use at xi.
+        numpy.ndarray: The set of regression weights to use at xi.
 
     '''
 
-    diffs = abs(x - xi)
-    return (1.0 - (diffs / (1.0001 * max(diffs))) ** 3) ** 3
+    diffs = np.abs(np.asarray(x, dtype=np.float64) - xi)
+    return np.interp(diffs / (_DMAX_SCALE * diffs.max()),
+                     _TRICUBE_U, _TRICUBE)
 
 
 def wLstSqReg(x, y, polynomialDegree, weights):
@@ -215,18 +425,15 @@ def wLstSqReg(x, y, polynomialDegree, weights):
     with weights.
 
     Args:
-        x (pandas.core.series.Series): a Pandas Series containing the x
-            (independent/covariat) values.
-        y (pandas.core.series.Series): a Pandas Series containing the y
-            (dependent) values. It must have the same index as x.
+        x (numpy.ndarray): the x (independent/covariat) values. A Pandas
+            Series is also accepted.
+        y (numpy.ndarray): the corresponding y (dependent) values.
         polynomialDegree (int): The degree of polynomial to use in the
             regression. It must be >= 0.
-        weights (pandas.core.series.Series): The set of regression weights to
-            be used
+        weights (numpy.ndarray): The set of regression weights to be used
 
     Returns:
-        pandas.core.series.Series: The fitted function evaluated at each point
-            in x.
+        numpy.ndarray: The fitted function evaluated at each point in x.
 
     Raises:
         LowessError:
@@ -237,27 +444,331 @@ def wLstSqReg(x, y, polynomialDegree, weights):
     '''
 
     # Check that the are at least as many data points as regression
-    # coefficients (unknowns). This is not necessary, as linalg.lstsq should
-    # still work (with an SVD cut), but it is not a good sign.
+    # coefficients (unknowns). An under determined system is singular,
+    # so the solve further down would fail anyway; checking up front
+    # gives the clearer message.
     if len(x) < polynomialDegree:
         raise LowessError('The least squares regreesion is under determined.'
                           'There are more fit variables than data points.')
 
-    # Create a 2D array with the monomials for each power up to
-    # polynomialDegree for each row in x
-    monomials = (x.to_numpy(np.float64)[:, np.newaxis] **
-                 np.arange(polynomialDegree + 1))
+    # Convert to NumPy arrays once.
+    xv = np.asarray(x, dtype=np.float64)
+    yv = np.asarray(y, dtype=np.float64)
+    wv = np.asarray(weights, dtype=np.float64)
+
+    # Centre the x values to keep the normal equations well conditioned;
+    # the fitted values are unchanged by the change of basis.
+    centre = xv.mean()
+
+    # Solve the normal equations: degrees up to two in closed form,
+    # higher degrees with a small (d+1)x(d+1) solve. With the centring
+    # this is well conditioned, so the SVD based lstsq is not needed.
+    beta = _regressWindows(xv, yv,
+                           np.arange(len(xv))[np.newaxis, :],
+                           wv[np.newaxis, :], np.array([centre]),
+                           polynomialDegree)[0]
+
+    # Return the fitted function evaluated at each point
+    return _vandermonde(xv - centre, polynomialDegree).dot(beta)
+
+
+def _smoothBlock(xs, ys, k, polynomialDegree, start, stop):
+    '''
+    Smooth the points at sorted positions [start, stop) in one batch.
+
+    Builds one fixed-width window of neighbouring points per point (the
+    windows of the points near the edges are padded by repeating the
+    boundary point, with the padding masked out by a zero weight),
+    calculates the tricubic weights for all of the windows at once by
+    interpolating into the precomputed kernel table, and solves all of
+    the weighted least squares regressions in one batch. The fits are
+    centred on each window's own point, so the constant term of each
+    fit is the smoothed value at that point. The window arrays take
+    memory in proportion to (stop - start) * (2 * k + 1), so callers
+    should bound the range as smooth() does with _BLOCK_ELEMENTS.
+
+    Args:
+        xs (numpy.ndarray): the x values, sorted, as float64.
+        ys (numpy.ndarray): the corresponding y values as float64.
+        k (int): the number of neighbouring points to take on each side.
+        polynomialDegree (int): The degree of polynomial to use in the
+            regression.
+        start (int): the first position to smooth.
+        stop (int): the position after the last one to smooth.
+
+    Returns:
+        numpy.ndarray: the smoothed y values for positions
+            [start, stop).
+
+    Raises:
+        LowessError: If the regression fails.
+
+    '''
+
+    N = len(xs)
+    positions = np.arange(start, stop)[:, np.newaxis] + np.arange(-k, k + 1)
+    valid = (positions >= 0) & (positions < N)
+    positions = np.clip(positions, 0, N - 1)
+
+    # The windows are sorted and contain their centres, so the maximum
+    # distance from a centre is attained at one of the window ends; no
+    # reduction over the window is needed.
+    centres = xs[start:stop]
+    diffs = np.abs(xs[positions] - centres[:, np.newaxis])
+    maxDiffs = np.maximum(centres - xs[positions[:, 0]],
+                          xs[positions[:, -1]] - centres)
+    weights = np.interp(diffs / (_DMAX_SCALE * maxDiffs[:, np.newaxis]),
+                        _TRICUBE_U, _TRICUBE)
+    weights *= valid
+
+    return _regressWindows(xs, ys, positions, weights, centres,
+                           polynomialDegree, centreOnly=True)
+
+
+def _vandermonde(x, polynomialDegree):
+    '''
+    Build the Vandermonde matrix of x for powers up to polynomialDegree.
+
+    The columns are built by cumulative multiplication, which avoids
+    raising every element to every power separately.
 
-    # Take the square root of the weights
-    sigma = np.sqrt(weights.to_numpy(np.float64))
+    Args:
+        x (numpy.ndarray): the x values as float64.
+        polynomialDegree (int): The highest power to include. It must be
+            >= 0.
+
+    Returns:
+        numpy.ndarray: a 2D array with one row per point and one column
+            per power, lowest power first.
+
+    '''
+
+    monomials = np.empty((len(x), polynomialDegree + 1))
+    monomials[:, 0] = 1.0
+    for p in range(1, polynomialDegree + 1):
+        monomials[:, p] = monomials[:, p - 1] * x
+    return monomials
+
+
+def _regressWindows(xs, ys, positions, weights, centres, polynomialDegree,
+                    centreOnly=False):
+    '''
+    Solve a batch of weighted least squares polynomial regressions, one
+    per window, all with the same dimensions.
+
+    The windows are given as rows of positions into xs and ys. The x
+    values of each window are centred on the window's own centre before
+    the monomials are formed, which keeps the normal equations well
+    conditioned even for higher degrees; the returned coefficients are
+    for the centred basis, so the constant term is the fitted value at
+    the centre. For polynomial degrees up to two the normal equations
+    are solved in closed form (Cramer's rule) from the weighted moment
+    sums, avoiding a linear algebra library call altogether. Higher
+    degrees are solved with a single batched np.linalg.solve on the
+    stacked normal equations, whose entries are the same moment sums.
+    The SVD based np.linalg.lstsq (LAPACK gelsd) is deliberately not
+    used anywhere: with the centring the normal equations are well
+    conditioned, so neither an SVD nor a QR factorisation (LAPACK
+    gels) is needed, and the latter would pull in scipy as a
+    dependency for its LAPACK bindings.
+
+    Args:
+        xs (numpy.ndarray): the x values as float64.
+        ys (numpy.ndarray): the corresponding y values as float64.
+        positions (numpy.ndarray): a 2D integer array with one window of
+            positions into xs and ys per row.
+        weights (numpy.ndarray): a 2D array of the corresponding regression
+            weights.
+        centres (numpy.ndarray): the centre of each window, which is
+            subtracted from its x values before fitting.
+        polynomialDegree (int): The degree of polynomial to use in the
+            regression. It must be >= 0.
+        centreOnly (bool, optional): If True, return only the constant
+            term of each fit (the fitted value at the centre) as a 1D
+            array, skipping the computation of the discarded higher
+            coefficients in the closed form paths.
+
+    Returns:
+        numpy.ndarray: a 2D array with one row of regression coefficients
+            per window, in powers of (x - centre), constant term first;
+            or a 1D array of the constant terms if centreOnly is True.
+
+    Raises:
+        LowessError: If the regression fails.
 
-    # Solve for the regression coefficients.
+    '''
+
+    if not (np.all(np.isfinite(weights)) and np.all(np.isfinite(ys))):
+        raise LowessError('The least squares regression failed.')
+
+    # Weighted moment sums S[p] = sum(w * (x - centre)**p) over each
+    # window for p up to twice the degree, and the corresponding
+    # T[p] = sum(w * (x - centre)**p * y) for p up to the degree. The
+    # centred powers are built by cumulative multiplication.
+    nCoeffs = polynomialDegree + 1
+    centred = xs[positions] - centres[:, np.newaxis]
+    yWindows = ys[positions]
+    S = np.empty((2 * polynomialDegree + 1, len(positions)))
+    T = np.empty((nCoeffs, len(positions)))
+    column = weights
+    for p in range(2 * polynomialDegree + 1):
+        if p > 0:
+            column = column * centred
+        S[p] = column.sum(axis=1)
+        if p < nCoeffs:
+            T[p] = (column * yWindows).sum(axis=1)
+
+    # Degree zero: the weighted mean.
+    if polynomialDegree == 0:
+        if np.any(S[0] == 0.0):
+            raise LowessError('The least squares regression failed.')
+        beta0 = T[0] / S[0]
+        if centreOnly:
+            return beta0
+        return beta0[:, np.newaxis]
+
+    # Degree one: a 2x2 system in the weighted moment sums.
+    if polynomialDegree == 1:
+        det = S[0] * S[2] - S[1] * S[1]
+        if np.any(det == 0.0):
+            raise LowessError('The least squares regression failed.')
+        beta0 = (S[2] * T[0] - S[1] * T[1]) / det
+        if centreOnly:
+            return beta0
+        return np.stack([beta0, (S[0] * T[1] - S[1] * T[0]) / det], axis=1)
+
+    # Degree two: a 3x3 system solved with Cramer's rule.
+    if polynomialDegree == 2:
+        det = (S[0] * (S[2] * S[4] - S[3] * S[3]) -
+               S[1] * (S[1] * S[4] - S[2] * S[3]) +
+               S[2] * (S[1] * S[3] - S[2] * S[2]))
+        if np.any(det == 0.0):
+            raise LowessError('The least squares regression failed.')
+        beta0 = (T[0] * (S[2] * S[4] - S[3] * S[3]) -
+                 S[1] * (T[1] * S[4] - T[2] * S[3]) +
+                 S[2] * (T[1] * S[3] - T[2] * S[2])) / det
+        if centreOnly:
+            return beta0
+        beta1 = (S[0] * (T[1] * S[4] - T[2] * S[3]) -
+                 T[0] * (S[1] * S[4] - S[2] * S[3]) +
+                 S[2] * (S[1] * T[2] - S[2] * T[1])) / det
+        beta2 = (S[0] * (S[2] * T[2] - S[3] * T[1]) -
+                 S[1] * (S[1] * T[2] - S[2] * T[1]) +
+                 T[0] * (S[1] * S[3] - S[2] * S[2])) / det
+        return np.stack([beta0, beta1, beta2], axis=1)
+
+    # General degree: batched normal equations (M'WM) beta = (M'W) y,
+    # whose (p, q) entry is the moment sum S[p + q]. The solve yields
+    # every coefficient regardless, so centreOnly just selects the
+    # constant terms.
+    powers = np.arange(nCoeffs)
+    lhs = S[powers[:, np.newaxis] + powers].transpose(2, 0, 1)
+    rhs = T.T[:, :, np.newaxis]
     try:
-        beta = np.linalg.lstsq(monomials * sigma[:, np.newaxis],
-                               y.to_numpy(np.float64) * sigma,
-                               rcond=None)[0]
-    except Exception:
+        beta = np.linalg.solve(lhs, rhs)[:, :, 0]
+    except np.linalg.LinAlgError:
+        # Singular systems raise, as in the closed form paths and the
+        # compiled kernels, rather than silently returning a minimum
+        # norm solution only at higher degrees.
         raise LowessError('The least squares regression failed.')
+    if centreOnly:
+        return beta[:, 0]
+    return beta
 
-    # Return the fitted function evaluated at each point
-    return monomials.dot(beta)
+
+def _lowessCore(xs, ys, k, polynomialDegree):
+    '''
+    Compiled kernel for the lowess regression loop.
+
+    Each point is independent of the others, so when Numba is available
+    the loop is JIT compiled and run in parallel across cores. Each
+    window is fitted in the basis of powers of (x - centre) for
+    conditioning, and the small normal equations system is solved in
+    place with Gaussian elimination to avoid a LAPACK call per point.
+
+    Args:
+        xs (numpy.ndarray): the x values, sorted, as float64.
+        ys (numpy.ndarray): the corresponding y values as float64.
+        k (int): the number of neighbouring points to take on each side.
+        polynomialDegree (int): The degree of polynomial to use in the
+            regression.
+
+    Returns:
+        numpy.ndarray: the smoothed y values in sorted order. Entries are
+            non-finite if a regression failed.
+
+    '''
+
+    N = xs.shape[0]
+    nCoeffs = polynomialDegree + 1
+    smoothed = np.empty(N)
+    for i in prange(N):
+        lo = max(0, i - k)
+        hi = min(N, i + k + 1)
+        xi = xs[i]
+
+        # The window is sorted and contains its centre, so the maximum
+        # distance from the centre is attained at one of the ends.
+        maxDiff = max(xi - xs[lo], xs[hi - 1] - xi)
+        scale = _DMAX_SCALE * maxDiff
+
+        # Accumulate the weighted normal equations (M'WM) beta = (M'W) y
+        # in the basis of powers of (x - xi), which keeps the system
+        # well conditioned.
+        lhs = np.zeros((nCoeffs, nCoeffs))
+        rhs = np.zeros(nCoeffs)
+        mono = np.empty(nCoeffs)
+        for j in range(lo, hi):
+            u = abs(xs[j] - xi) / scale
+            t = 1.0 - u * u * u
+            w = t * t * t
+            # The weight of the outermost points is negligible; skip
+            # them rather than accumulating terms that change nothing.
+            if w < _WEIGHT_EPS:
+                continue
+            mono[0] = 1.0
+            for p in range(1, nCoeffs):
+                mono[p] = mono[p - 1] * (xs[j] - xi)
+            for p in range(nCoeffs):
+                for q in range(nCoeffs):
+                    lhs[p, q] += w * mono[p] * mono[q]
+                rhs[p] += w * mono[p] * ys[j]
+
+        # Gaussian elimination with partial pivoting.
+        for col in range(nCoeffs):
+            pivot = col
+            for row in range(col + 1, nCoeffs):
+                if abs(lhs[row, col]) > abs(lhs[pivot, col]):
+                    pivot = row
+            if pivot != col:
+                for c in range(col, nCoeffs):
+                    tmp = lhs[col, c]
+                    lhs[col, c] = lhs[pivot, c]
+                    lhs[pivot, c] = tmp
+                tmp = rhs[col]
+                rhs[col] = rhs[pivot]
+                rhs[pivot] = tmp
+            for row in range(col + 1, nCoeffs):
+                factor = lhs[row, col] / lhs[col, col]
+                for c in range(col, nCoeffs):
+                    lhs[row, c] -= factor * lhs[col, c]
+                rhs[row] -= factor * rhs[col]
+
+        # Back substitution.
+        beta = np.empty(nCoeffs)
+        for row in range(nCoeffs - 1, -1, -1):
+            acc = rhs[row]
+            for c in range(row + 1, nCoeffs):
+                acc -= lhs[row, c] * beta[c]
+            beta[row] = acc / lhs[row, row]
+
+        # In the centred basis the constant term is the fitted value at
+        # the centre point.
+        smoothed[i] = beta[0]
+
+    return smoothed
+
+
+if _HAVE_NUMBA:
+    _lowessCore = njit(parallel=True, fastmath=True,
+                       cache=True)(_lowessCore)
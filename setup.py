@@ -1,6 +1,7 @@
 import os
 import re
-from setuptools import setup
+import sys
+from setuptools import setup, Extension
 
 # Allow setup.py to be run from any path.
 os.chdir(os.path.normpath(os.path.join(os.path.abspath(__file__), os.pardir)))
@@ -37,11 +38,31 @@ def find_version(fname):
     return version
 
 
+def extensionModules():
+    '''
+    Build the optional C kernel when NumPy headers are available. The
+    package works without it, falling back to the pure Python
+    implementation, so build failures are not fatal (optional=True).
+    '''
+    try:
+        import numpy
+    except ImportError:
+        return []
+    openmp = [] if sys.platform == 'win32' else ['-fopenmp']
+    return [Extension('lowess._lowess',
+                      sources=['lowess/_lowessmodule.c'],
+                      include_dirs=[numpy.get_include()],
+                      extra_compile_args=['-O3'] + openmp,
+                      extra_link_args=openmp,
+                      optional=True)]
+
+
 setup(
     name='lowess',
     version=find_version(os.path.join(ROOT, 'lowess/lowess.py')),
     packages=['lowess'],
     package_data={},
+    ext_modules=extensionModules(),
     author='Andrew Lee',
     include_package_data=True,
     zip_safe=False,
@@ -1,6 +1,7 @@
 '''
 Test suite for lowess package
 '''
+import importlib
 import unittest
 import pandas as pd
 import numpy as np
@@ -154,6 +155,101 @@ class TestLowess(unittest.TestCase):
                   1e-10 for i in result.index])
         self.assertTrue(eql, 'Results equal on shuffle.')
 
+    def testEmptySeries(self):
+        '''
+        Smooth an empty series with each backend and check that an
+        empty series is returned rather than an exception raised.
+        '''
+        x = pd.Series([], dtype=np.float64)
+        y = pd.Series([], dtype=np.float64)
+        module = importlib.import_module('lowess.lowess')
+        saved = (module._HAVE_CEXT, module._HAVE_NUMBA)
+        backends = [saved, (False, saved[1]), (False, False)]
+        correct = []
+        try:
+            for cext, numba in backends:
+                module._HAVE_CEXT = cext
+                module._HAVE_NUMBA = numba
+                correct.append(len(lowess.lowess(x, y)) == 0)
+        finally:
+            module._HAVE_CEXT, module._HAVE_NUMBA = saved
+        self.assertTrue(all(correct), 'Empty input smooths to empty.')
+
+    def testQuadraticRegression(self):
+        '''
+        Fit an exact quadratic with wLstSqReg at polynomialDegree=2 and
+        check that every coefficient is recovered, not just the
+        constant term used by the smoothing path.
+        '''
+        module = importlib.import_module('lowess.lowess')
+        x = np.linspace(-1.0, 3.0, 50)
+        y = 1.5 - 2.0 * x + 0.5 * x ** 2
+        weights = np.linspace(0.5, 1.5, len(x))
+        fitted = module.wLstSqReg(x, y, 2, weights)
+        self.assertTrue(max(abs(fitted - y)) < 1e-10,
+                        'Exact quadratic reproduced.')
+
+    def testPrepareSmooth(self):
+        '''
+        Prepare the data once, smooth it with several bandwidths, and
+        check that the results are the same as calling lowess directly.
+        '''
+        prepared = lowess.prepare(self.knownResults['x'],
+                                  self.knownResults['y'])
+        correct = []
+        for i in range(1, 10):
+            bwidth = 0.1 * i
+            result = lowess.smooth(prepared,
+                                   bandwidth=bwidth,
+                                   polynomialDegree=1)
+            direct = lowess.lowess(self.knownResults['x'],
+                                   self.knownResults['y'],
+                                   bandwidth=bwidth,
+                                   polynomialDegree=1)
+            correct.append(all([abs((result[j] - direct[j]) /
+                                    (result[j] + direct[j])) < 1e-10
+                                for j in direct.index]))
+        self.assertTrue(all(correct), 'smooth the same as lowess.')
+
+    def testInvalidPrepared(self):
+        '''
+        Try calling smooth with something that is not the output of
+        prepare, and check that an exception is raised.
+        '''
+        invalids = ['a', True, None, (1, 2), self.knownResults,
+                    self.knownResults['x']]
+        for prepared in invalids:
+            with self.assertRaises(LowessError):
+                _ = lowess.smooth(prepared,
+                                  bandwidth=0.2,
+                                  polynomialDegree=1)
+
+    def testBackends(self):
+        '''
+        Force each backend (C, Numba and NumPy) in turn and check that
+        every one agrees with the known STATA results.
+        '''
+        module = importlib.import_module('lowess.lowess')
+        saved = (module._HAVE_CEXT, module._HAVE_NUMBA)
+        backends = [saved, (False, saved[1]), (False, False)]
+        correct = []
+        try:
+            for cext, numba in backends:
+                module._HAVE_CEXT = cext
+                module._HAVE_NUMBA = numba
+                for deg in [0, 1]:
+                    tmp = lowess.lowess(self.knownResults['x'],
+                                        self.knownResults['y'],
+                                        bandwidth=0.4,
+                                        polynomialDegree=deg)
+                    col = 'y_Stata_4_{}'.format(deg)
+                    correct.append(max(abs((self.knownResults[col] - tmp) /
+                                           (self.knownResults[col] + tmp))) <
+                                   1e-5)
+        finally:
+            module._HAVE_CEXT, module._HAVE_NUMBA = saved
+        self.assertTrue(all(correct), 'All backends the same as STATA.')
+
 
 if __name__ == '__main__':
     unittest.main()